@@ -11,8 +11,18 @@ MakeMyTrip Hotel Booking Automation with Google Sheets + ScrapingBee
 
 import time
 import os
+import sys
+import json
+import functools
+import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
+import requests
 import pandas as pd
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
@@ -22,8 +32,11 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException,
+    ElementClickInterceptedException, ElementNotInteractableException, InvalidElementStateException,
+    JavascriptException,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -35,6 +48,9 @@ load_dotenv()
 class GoogleSheetsManager:
     """Manages reading and updating Google Sheets"""
     
+    # Columns written back after each booking
+    RESULT_COLUMNS = ('Status', 'Booking_id', 'Price')
+    
     def __init__(self, sheet_url):
         self.sheet_url = sheet_url
         self.sheet = None
@@ -42,6 +58,15 @@ class GoogleSheetsManager:
         self.df = None
         self.sheet_id = None
         self.credentials = None
+        self._header = []
+        self._col = {}
+        self._row_to_iloc = {}
+        self._col_to_iloc = {}
+        self._pending_updates = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()  # gspread and the DataFrame are shared by booking workers
+        self._writer = ThreadPoolExecutor(max_workers=1)  # Single writer keeps sheet writes in order
+        self._write_futures = []
         self.connect()
     
     def connect(self):
@@ -76,11 +101,51 @@ class GoogleSheetsManager:
                 print(f"  ℹ️  API auth failed: {e}")
                 print(f"  → Using read-only CSV export mode")
             
-            # Use pandas to read Google Sheet
-            csv_url = f"https://docs.google.com/spreadsheets/d/{self.sheet_id}/export?format=csv"
-            print(f"  → Reading data from CSV export...")
+            self.df = None
+            self._header = []
+            self._col = {}
             
-            self.df = pd.read_csv(csv_url)
+            # Read through the API when authenticated - one call, no CSV export
+            if self.worksheet:
+                try:
+                    print(f"  → Reading data from Google Sheets API...")
+                    values = self.worksheet.get_all_values()
+                    self.df = self._values_to_dataframe(values)
+                    
+                    # Cache header row once - column positions don't change between writes
+                    self._header = values[0] if values else []
+                    self._col = {name: i + 1 for i, name in enumerate(self._header)}
+                except Exception as e:
+                    print(f"  ℹ️  API read failed: {e}")
+                    self.df = None
+            
+            if self.df is None:
+                # Use pandas to read Google Sheet
+                csv_url = f"https://docs.google.com/spreadsheets/d/{self.sheet_id}/export?format=csv"
+                print(f"  → Reading data from CSV export...")
+                
+                self.df = pd.read_csv(csv_url, dtype=str)
+            
+            # Writes address cells by header position - without it new columns would start at column A
+            if self.worksheet and not self._header:
+                try:
+                    self._header = self.worksheet.row_values(1)
+                    self._col = {name: i + 1 for i, name in enumerate(self._header)}
+                except Exception as e:
+                    print(f"  ℹ️  Header read failed: {e}")
+                    print(f"  → Sheet writes disabled - results kept in local data only")
+                    self.worksheet = None
+            
+            # Create result columns once as text columns, not on every write
+            for column in self.RESULT_COLUMNS:
+                if column in self.df.columns:
+                    self.df[column] = self.df[column].astype(object)
+                else:
+                    self.df[column] = ''
+            
+            # Positional lookups for writes - sheet row N is DataFrame position N-2 (header is row 1)
+            self._row_to_iloc = {i + 2: i for i in range(len(self.df))}
+            self._col_to_iloc = {name: i for i, name in enumerate(self.df.columns)}
             
             print(f"✅ Connected to Google Sheet")
             print(f"   Columns found: {list(self.df.columns)[:5]}...")
@@ -94,161 +159,161 @@ class GoogleSheetsManager:
             print(f"   2. Check that the URL is correct")
             print(f"   3. Verify you have internet connection")
             self.df = pd.DataFrame()
+            self._row_to_iloc = {}
+            self._col_to_iloc = {}
             return False
     
-    def update_booking_id(self, row_number, booking_id):
+    @staticmethod
+    def _values_to_dataframe(values):
         """
-        Update booking ID for a specific row in Google Sheet
+        Build a DataFrame from worksheet.get_all_values() output
+        Empty cells become NaN and everything else stays text, matching pd.read_csv(dtype=str)
+        (numeric columns are converted by _int_column - a float round-trip corrupts 18-digit hotel IDs)
         """
-        try:
-            print(f"\n  → Updating Booking ID for row {row_number}...")
-            
-            # Update local DataFrame first
-            if 'Booking_id' not in self.df.columns:
-                self.df['Booking_id'] = ''
+        if not values:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(values[1:], columns=values[0])
+        return df.replace('', float('nan'))
+
+    def _write_cell(self, row_number, column, value):
+        """
+        Write a value to the local DataFrame and queue it for the Google Sheet
+        Returns: False if row_number is outside the sheet data
+        """
+        with self._lock:
+            df_iloc = self._row_to_iloc.get(row_number)
             
-            df_index = row_number - 2  # row_number is 1-indexed with header
+            if df_iloc is None:
+                return False
             
-            if 0 <= df_index < len(self.df):
-                self.df.at[df_index, 'Booking_id'] = booking_id
-                print(f"  ✓ Booking ID updated in local data: {booking_id}")
-                
-                # Try to update Google Sheet directly if we have API access
-                if self.worksheet:
-                    try:
-                        # Find Booking_id column
-                        header_row = self.worksheet.row_values(1)
-                        
-                        # Find or create Booking_id column
-                        if 'Booking_id' in header_row:
-                            col_index = header_row.index('Booking_id') + 1
-                        else:
-                            # Add new column
-                            col_index = len(header_row) + 1
-                            self.worksheet.update_cell(1, col_index, 'Booking_id')
-                            print(f"  ✓ Created 'Booking_id' column")
-                        
-                        # Update the cell
-                        self.worksheet.update_cell(row_number, col_index, booking_id)
-                        print(f"  ✅ Booking ID written to Google Sheet: {booking_id}")
-                        return True
-                        
-                    except Exception as e:
-                        print(f"  ⚠️  Could not write to Google Sheet: {e}")
-                        print(f"  → Saved to local data only")
-                else:
-                    print(f"  ⚠️  No write access to Google Sheet")
-                    print(f"  → To enable writing, add 'credentials.json' file")
-                    print(f"  → Booking ID saved in local data only")
+            self.df.iat[df_iloc, self._col_to_iloc[column]] = value
+            
+            if self.worksheet:
+                if column not in self._col:
+                    # New column - header cell goes out in the same batch
+                    self._header.append(column)
+                    self._col[column] = len(self._header)
+                    self._pending_updates.append({
+                        'range': gspread.utils.rowcol_to_a1(1, self._col[column]),
+                        'values': [[column]]
+                    })
+                    print(f"  ✓ Queued new '{column}' column")
                 
+                self._pending_updates.append({
+                    'range': gspread.utils.rowcol_to_a1(row_number, self._col[column]),
+                    'values': [[value]]
+                })
+            
+            return True
+
+    def flush(self, min_rows=0):
+        """
+        Send all queued cell updates to Google Sheet as a single batch request
+        The request runs on a background writer thread so the browser keeps working
+        min_rows: only send once at least this many update_row() rows are queued
+        """
+        with self._lock:
+            if not self._pending_updates or self._pending_rows < min_rows:
                 return True
-            else:
-                print(f"  ✗ Invalid row number: {row_number}")
+            
+            if not self.worksheet:
+                self._pending_updates = []
+                self._pending_rows = 0
                 return False
-                
+            
+            updates = self._pending_updates
+            self._pending_updates = []
+            self._pending_rows = 0
+            self._write_futures.append(self._writer.submit(self._send_batch, updates))
+            return True
+
+    def _send_batch(self, updates):
+        """Write a batch of cell updates - runs on the writer thread"""
+        try:
+            self.worksheet.batch_update(updates, value_input_option='RAW')
+            print(f"  ✅ Wrote {len(updates)} cell(s) to Google Sheet")
+            return True
         except Exception as e:
-            print(f"  ✗ Error updating booking ID: {e}")
+            print(f"  ⚠️  Could not write to Google Sheet: {e}")
+            print(f"  → Saved to local data only")
             return False
-    
-    def update_price(self, row_number, price):
+
+    def wait_for_writes(self):
+        """
+        Flush anything still queued and block until every background write has finished
+        Returns: True if all writes succeeded
+        """
+        self.flush()
+        
+        with self._lock:
+            futures = self._write_futures
+            self._write_futures = []
+        
+        return all([future.result() for future in futures])
+
+    def update_row(self, row_number, values):
         """
-        Update price for a specific row in Google Sheet
+        Update several result columns for one row - queued together, sent in one batch on flush()
+        values: dict of column -> value, None and empty-string values are skipped
+        Returns: True if every value was written to local data
         """
+        values = {column: value for column, value in values.items() if value is not None and value != ""}
+        
         try:
-            print(f"  → Updating Price for row {row_number}...")
-            
-            # Update local DataFrame first
-            if 'Price' not in self.df.columns:
-                self.df['Price'] = ''
+            for column, value in values.items():
+                if not self._write_cell(row_number, column, value):
+                    print(f"  ✗ Invalid row number: {row_number}")
+                    return False
             
-            df_index = row_number - 2
+            with self._lock:
+                self._pending_rows += 1
             
-            if 0 <= df_index < len(self.df):
-                self.df.at[df_index, 'Price'] = price
-                print(f"  ✓ Price updated in local data: {price}")
-                
-                # Try to update Google Sheet directly if we have API access
-                if self.worksheet:
-                    try:
-                        header_row = self.worksheet.row_values(1)
-                        
-                        # Find or create Price column
-                        if 'Price' in header_row:
-                            col_index = header_row.index('Price') + 1
-                        else:
-                            col_index = len(header_row) + 1
-                            self.worksheet.update_cell(1, col_index, 'Price')
-                            print(f"  ✓ Created 'Price' column")
-                        
-                        # Update the cell
-                        self.worksheet.update_cell(row_number, col_index, price)
-                        print(f"  ✅ Price written to Google Sheet: {price}")
-                        return True
-                        
-                    except Exception as e:
-                        print(f"  ⚠️  Could not write price to Google Sheet: {e}")
-                else:
-                    print(f"  ⚠️  No write access - Price saved in local data only")
-                
-                return True
+            summary = ", ".join(f"{column}={value}" for column, value in values.items())
+            if self.worksheet:
+                print(f"  ✓ Row {row_number} queued for Google Sheet: {summary}")
             else:
-                print(f"  ✗ Invalid row number: {row_number}")
-                return False
+                print(f"  ⚠️  No write access - row {row_number} saved in local data only: {summary}")
+                print(f"  → To enable writing, add 'credentials.json' file")
+            
+            return True
                 
         except Exception as e:
-            print(f"  ✗ Error updating price: {e}")
+            print(f"  ✗ Error updating row {row_number}: {e}")
             return False
     
+    def update_booking_id(self, row_number, booking_id):
+        """Update booking ID for a specific row in Google Sheet - shorthand for update_row()"""
+        return self.update_row(row_number, {'Booking_id': booking_id})
+    
+    def update_price(self, row_number, price):
+        """Update price for a specific row in Google Sheet - shorthand for update_row()"""
+        return self.update_row(row_number, {'Price': price})
+    
     def update_status(self, row_number, status):
         """
-        Update status for a specific row in Google Sheet
+        Update status for a specific row in Google Sheet - shorthand for update_row()
         status: 'Completed', 'Skipped', 'Failed', etc.
         """
-        try:
-            print(f"  → Updating Status for row {row_number}: {status}...")
-            
-            # Update local DataFrame first
-            if 'Status' not in self.df.columns:
-                self.df['Status'] = ''
-            
-            df_index = row_number - 2
-            
-            if 0 <= df_index < len(self.df):
-                self.df.at[df_index, 'Status'] = status
-                print(f"  ✓ Status updated in local data: {status}")
-                
-                # Try to update Google Sheet directly if we have API access
-                if self.worksheet:
-                    try:
-                        header_row = self.worksheet.row_values(1)
-                        
-                        # Find Status column (should already exist)
-                        if 'Status' in header_row:
-                            col_index = header_row.index('Status') + 1
-                        else:
-                            col_index = len(header_row) + 1
-                            self.worksheet.update_cell(1, col_index, 'Status')
-                            print(f"  ✓ Created 'Status' column")
-                        
-                        # Update the cell
-                        self.worksheet.update_cell(row_number, col_index, status)
-                        print(f"  ✅ Status written to Google Sheet: {status}")
-                        return True
-                        
-                    except Exception as e:
-                        print(f"  ⚠️  Could not write status to Google Sheet: {e}")
-                else:
-                    print(f"  ⚠️  No write access - Status saved in local data only")
-                
-                return True
-            else:
-                print(f"  ✗ Invalid row number: {row_number}")
-                return False
-                
-        except Exception as e:
-            print(f"  ✗ Error updating status: {e}")
-            return False
+        return self.update_row(row_number, {'Status': status})
     
+    @staticmethod
+    def _text_column(frame, *names):
+        """First of the named columns as stripped text - empty string when missing"""
+        for name in names:
+            if name in frame.columns:
+                column = frame[name]
+                return column.astype(str).where(column.notna(), '').str.strip()
+        return pd.Series('', index=frame.index)
+
+    @staticmethod
+    def _int_column(frame, default, *names):
+        """First of the named columns as integers - default when missing or unparseable"""
+        for name in names:
+            if name in frame.columns:
+                return pd.to_numeric(frame[name], errors='coerce').fillna(default).astype(int)
+        return pd.Series(default, index=frame.index)
+
     def get_pending_bookings(self):
         """Get all pending bookings from sheet"""
         try:
@@ -262,58 +327,42 @@ class GoogleSheetsManager:
             
             # Filter rows where Status is 'Pending' or empty
             if 'Status' in self.df.columns:
-                # Convert Status to string to handle NaN and other types
-                self.df['Status'] = self.df['Status'].astype(str)
-                pending = self.df[
-                    (self.df['Status'] == 'nan') |  # NaN values become 'nan' string
-                    (self.df['Status'].str.lower().str.strip() == 'pending')
-                ]
+                # Boolean mask only - self.df is left untouched
+                status = self.df['Status'].fillna('').astype(str).str.strip().str.lower()
+                pending = self.df.loc[status.isin({'', 'nan', 'pending'})]
                 print(f"  → Rows with Status='Pending' or empty: {len(pending)}")
             else:
                 print(f"  ⚠️  No 'Status' column found - processing all rows")
                 pending = self.df
             
-            bookings = []
-            
-            for idx, row in pending.iterrows():
-                try:
-                    # Map column names - support both formats
-                    hotel_id = str(row.get('MMT_HOTEL_ID', row.get('Hotel ID', ''))).strip()
-                    city_code = str(row.get('City Code', '')).strip().upper()
-                    
-                    # Handle Check-in column (might be days or actual date)
-                    checkin_value = row.get('Check-in', row.get('Check-in (days)', 7))
-                    try:
-                        checkin_days = int(checkin_value)
-                    except:
-                        checkin_days = 7  # Default if can't parse
-                    
-                    booking = {
-                        'row_number': idx + 2,  # +2 because: 0-indexed + 1 header row
-                        'hotel_id': hotel_id,
-                        'city_code': city_code,
-                        'checkin_days': checkin_days,
-                        'nights': int(row.get('Nights', 1)),
-                        'adults': int(row.get('Adults', 2)),
-                        'children': int(row.get('Children', 0)),
-                        'rooms': int(row.get('Rooms', 1)),
-                        'first_name': str(row.get('First Name', '')).strip(),
-                        'last_name': str(row.get('Last Name', '')).strip(),
-                        'email': str(row.get('Email', '')).strip(),
-                        'mobile': str(row.get('Mobile', '')).strip(),
-                        'upi_id': str(row.get('UPI ID', '')).strip()
-                    }
-                    
-                    # Validate required fields
-                    if booking['hotel_id'] and booking['city_code']:
-                        bookings.append(booking)
-                        print(f"  ✓ Row {booking['row_number']}: {booking['hotel_id']} - {booking['city_code']}")
-                    else:
-                        print(f"  ⚠️  Skipping row {booking['row_number']}: Missing Hotel ID or City Code")
-                
-                except Exception as e:
-                    print(f"  ⚠️  Error processing row {idx + 2}: {e}")
-                    continue
+            # Map column names - support both formats (whole columns at once, no per-row loop)
+            rows = pd.DataFrame({
+                'row_number': pending.index + 2,  # +2 because: 0-indexed + 1 header row
+                'hotel_id': self._text_column(pending, 'MMT_HOTEL_ID', 'Hotel ID'),
+                'city_code': self._text_column(pending, 'City Code').str.upper(),
+                # Check-in might be days or an actual date - default if it doesn't parse
+                'checkin_days': self._int_column(pending, 7, 'Check-in', 'Check-in (days)'),
+                'nights': self._int_column(pending, 1, 'Nights'),
+                'adults': self._int_column(pending, 2, 'Adults'),
+                'children': self._int_column(pending, 0, 'Children'),
+                'rooms': self._int_column(pending, 1, 'Rooms'),
+                'first_name': self._text_column(pending, 'First Name'),
+                'last_name': self._text_column(pending, 'Last Name'),
+                'email': self._text_column(pending, 'Email'),
+                'mobile': self._text_column(pending, 'Mobile'),
+                'upi_id': self._text_column(pending, 'UPI ID')
+            }, index=pending.index)
+            
+            # Validate required fields
+            valid = rows['hotel_id'].ne('') & rows['city_code'].ne('')
+            
+            for row_number in rows.loc[~valid, 'row_number']:
+                print(f"  ⚠️  Skipping row {row_number}: Missing Hotel ID or City Code")
+            
+            bookings = rows.loc[valid].to_dict('records')
+            
+            for booking in bookings:
+                print(f"  ✓ Row {booking['row_number']}: {booking['hotel_id']} - {booking['city_code']}")
             
             return bookings
             
@@ -336,37 +385,58 @@ class Config:
     # Google Sheets
     SHEET_URL = None
     
-    # Current booking data (populated from sheet)
-    HOTEL_ID = None
-    CITY_CODE = None
-    CHECKIN_DATE = None
-    CHECKOUT_DATE = None
-    ADULTS = None
-    CHILDREN = None
-    ROOMS = None
-    GUEST_FIRST_NAME = None
-    GUEST_LAST_NAME = None
-    GUEST_EMAIL = None
-    GUEST_MOBILE = None
-    UPI_ID = None
-    
     # ScrapingBee settings (loaded from .env)
     SCRAPINGBEE_API_KEY = os.getenv("SCRAPINGBEE_API_KEY", "")
     SCRAPINGBEE_PREMIUM = True
     SCRAPINGBEE_COUNTRY = "in"
-    SCRAPINGBEE_RENDER_JS = True
-    SCRAPINGBEE_WAIT = 3000
+    # Selenium already renders JS - ScrapingBee rendering/wait would only add latency and credits
+    SCRAPINGBEE_RENDER_JS = False
+    SCRAPINGBEE_WAIT = 0
+    # Fetch the next booking's hotel page through the ScrapingBee API while the current one runs,
+    # so upstream DNS/TLS/session state is warm - each prefetch is a billed request, opt in via .env
+    PREFETCH_NEXT_HOTEL = os.getenv("PREFETCH_NEXT_HOTEL", "0") == "1"
     
     # Browser settings
     HEADLESS = False
     WINDOW_SIZE = "1920,1080"
-    IMPLICIT_WAIT = 8
+    CHROME_PROFILE_DIR = "./.chrome-profile/"  # None for a fresh profile every launch
+    BLOCK_IMAGES = True  # Less proxy bandwidth and faster loads; set False for full-fidelity screenshots
+    IMPLICIT_WAIT = 0  # Keep at 0 - an implicit wait stalls every negative find() lookup; use WaitHelpers
     EXPLICIT_WAIT = 15
-    PAGE_LOAD_TIMEOUT = 30
+    STEP_TIMEOUT = 10  # Max wait for a booking step's element - returns as soon as it's ready
+    POPUP_TIMEOUT = 3  # Max wait for an optional popup to appear
+    PAGE_LOAD_TIMEOUT = 15
+    PAGE_LOAD_STRATEGY = "eager"  # driver.get() returns at DOMContentLoaded, WaitHelpers handle the rest
+    
+    # Third-party trackers blocked at the network layer (CDP Network.setBlockedURLs)
+    BLOCKED_URL_PATTERNS = [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*adservice.google.*",
+        "*hotjar.com*",
+        "*facebook.net*",
+    ]
+    
+    # Parallel bookings - one browser per worker, keep within ScrapingBee concurrency quota
+    # Each worker owns its driver for the whole run, so no session is ever shared; override in .env
+    MAX_WORKERS = int(os.getenv("MAX_WORKERS", "1"))
     
     # Payment waiting settings
     PAYMENT_WAIT_TIMEOUT = 15
-    PAYMENT_CHECK_INTERVAL = 5
+    PAYMENT_CHECK_INTERVAL = 0.25  # First re-check of the in-page payment observer flag - doubles after each miss
+    PAYMENT_CHECK_MAX_INTERVAL = 2  # Cap on the backoff between checks
+    
+    # Rows per Google Sheet write - 1 keeps the sheet current after every booking,
+    # higher values send fewer requests (anything unsent is flushed when the run ends)
+    SHEET_FLUSH_ROWS = 1
+    
+    # Print each booking's full details before processing it - override in .env
+    VERBOSE = os.getenv("VERBOSE", "1") != "0"
+    
+    # Pacing - override in .env
+    INTER_BOOKING_DELAY = float(os.getenv("INTER_BOOKING_DELAY", "2"))  # Cool-down before a worker's next booking
+    KEEP_OPEN_SECONDS = int(os.getenv("KEEP_OPEN_SECONDS", "0"))  # Keep browsers open after the run (terminal only)
     
     SCREENSHOT_PATH = "./screenshots/"
 
@@ -375,43 +445,74 @@ class Config:
 # BOOKING DATA LOADER
 # =========================================================
 
-def load_booking_from_dict(booking_data):
-    """Load booking data into Config from dictionary"""
-    Config.HOTEL_ID = booking_data['hotel_id']
-    Config.CITY_CODE = booking_data['city_code']
-    Config.ADULTS = booking_data['adults']
-    Config.CHILDREN = booking_data['children']
-    Config.ROOMS = booking_data['rooms']
-    Config.GUEST_FIRST_NAME = booking_data['first_name']
-    Config.GUEST_LAST_NAME = booking_data['last_name']
-    Config.GUEST_EMAIL = booking_data['email']
-    Config.GUEST_MOBILE = booking_data['mobile']
-    Config.UPI_ID = booking_data['upi_id']
+@dataclass(frozen=True, slots=True)
+class Booking:
+    """
+    One pending sheet row, parsed once before any browser starts
+    Immutable and passed explicitly, so parallel workers never share booking state
+    """
+    row_number: int
+    hotel_id: str
+    city_code: str
+    checkin: datetime
+    checkout: datetime
+    adults: int
+    children: int
+    rooms: int
+    first_name: str
+    last_name: str
+    email: str
+    mobile: str
+    upi_id: str
     
-    # Calculate dates
-    checkin = datetime.now() + timedelta(days=booking_data['checkin_days'])
-    checkout = checkin + timedelta(days=booking_data['nights'])
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a Booking from a get_pending_bookings() row dictionary
+        Returns: Booking with check-in/check-out resolved to dates
+        """
+        checkin = datetime.now() + timedelta(days=int(row['checkin_days']))
+        return cls(
+            row_number=int(row['row_number']),
+            hotel_id=str(row['hotel_id']),
+            city_code=str(row['city_code']),
+            checkin=checkin,
+            checkout=checkin + timedelta(days=int(row['nights'])),
+            adults=int(row['adults']),
+            children=int(row['children']),
+            rooms=int(row['rooms']),
+            first_name=str(row['first_name']),
+            last_name=str(row['last_name']),
+            email=str(row['email']),
+            mobile=str(row['mobile']),
+            upi_id=str(row['upi_id']),
+        )
     
-    Config.CHECKIN_DATE = checkin.strftime("%m%d%Y")
-    Config.CHECKOUT_DATE = checkout.strftime("%m%d%Y")
+    @property
+    def checkin_date(self):
+        """Check-in in MakeMyTrip's URL format (MMDDYYYY)"""
+        return self.checkin.strftime("%m%d%Y")
     
-    return checkin, checkout
+    @property
+    def checkout_date(self):
+        """Check-out in MakeMyTrip's URL format (MMDDYYYY)"""
+        return self.checkout.strftime("%m%d%Y")
 
 
-def build_hotel_url():
-    """Build MakeMyTrip hotel URL from Config"""
-    room_qualifier = f"{Config.ADULTS}e{Config.CHILDREN}e"
-    rsc = f"{Config.ROOMS}e{Config.ADULTS}e{Config.CHILDREN}e"
+def build_hotel_url(booking):
+    """Build MakeMyTrip hotel URL from booking data"""
+    room_qualifier = f"{booking.adults}e{booking.children}e"
+    rsc = f"{booking.rooms}e{booking.adults}e{booking.children}e"
     
     url = (
         f"https://www.makemytrip.com/hotels/hotel-details/"
-        f"?hotelId={Config.HOTEL_ID}"
+        f"?hotelId={booking.hotel_id}"
         f"&_uCurrency=INR"
-        f"&checkin={Config.CHECKIN_DATE}"
-        f"&checkout={Config.CHECKOUT_DATE}"
-        f"&city={Config.CITY_CODE}"
+        f"&checkin={booking.checkin_date}"
+        f"&checkout={booking.checkout_date}"
+        f"&city={booking.city_code}"
         f"&country=IN"
-        f"&locusId={Config.CITY_CODE}"
+        f"&locusId={booking.city_code}"
         f"&locusType=city"
         f"&roomStayQualifier={room_qualifier}"
         f"&rsc={rsc}"
@@ -424,8 +525,72 @@ def build_hotel_url():
 # BROWSER SETUP
 # =========================================================
 
-def setup_driver_with_scrapingbee(use_proxy=True):
-    """Setup Chrome WebDriver with optional ScrapingBee proxy"""
+# Driver and browser paths Selenium Manager resolved for the first browser - reused by every later one
+# (a preset driver path skips Selenium Manager, which is also what sets options.binary_location)
+_CHROMEDRIVER_PATH = None
+_CHROME_BINARY = None
+
+
+def get_chromedriver_path():
+    """
+    Pinned ChromeDriver from CHROMEDRIVER_PATH in .env
+    Otherwise the path resolved on the first launch, or None to let Selenium Manager
+    (built into Selenium) find a matching driver
+    """
+    return os.getenv("CHROMEDRIVER_PATH") or _CHROMEDRIVER_PATH
+
+
+def is_session_alive(driver):
+    """Check whether the WebDriver session is still usable"""
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def reset_browser_state(driver):
+    """Clear cookies and blank the page so the next booking starts clean"""
+    try:
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+    except WebDriverException as e:
+        print(f"  ⚠️  Could not reset browser state: {e}")
+
+
+def _apply_perf_prefs(driver):
+    """Block analytics/tracking requests that hold up MakeMyTrip page loads"""
+    if not Config.BLOCKED_URL_PATTERNS:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": Config.BLOCKED_URL_PATTERNS})
+        print(f"  ✓ Blocking {len(Config.BLOCKED_URL_PATTERNS)} tracker URL patterns")
+    except WebDriverException as e:
+        print(f"  ⚠️  Could not block tracker URLs: {e}")
+
+
+# Runs before any page script - hides the most common automation fingerprints
+_STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    Object.defineProperty(navigator, 'languages', {get: () => ['en-IN', 'en']});
+    window.chrome = window.chrome || {runtime: {}};
+"""
+
+
+def _apply_stealth(driver):
+    """Register the stealth script once per browser via CDP - applies to every page it loads"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _STEALTH_SCRIPT})
+    except WebDriverException as e:
+        print(f"  ⚠️  Could not apply stealth script: {e}")
+
+
+def setup_driver_with_scrapingbee(use_proxy=True, worker_id=0):
+    """
+    Setup Chrome WebDriver with optional ScrapingBee proxy
+    worker_id: selects this browser's persistent profile - Chrome can't share one across processes
+    """
     
     options = webdriver.ChromeOptions()
     
@@ -442,10 +607,22 @@ def setup_driver_with_scrapingbee(use_proxy=True):
     options.add_argument("--disable-popup-blocking")
     prefs = {
         "profile.default_content_setting_values.popups": 0,
-        "profile.popup_exception": "[]"
+        "profile.popup_exception": "[]",
+        "profile.default_content_setting_values.notifications": 2
     }
+    
+    # Skip image downloads - stylesheets stay on, visibility checks depend on them
+    if Config.BLOCK_IMAGES:
+        prefs["profile.managed_default_content_settings.images"] = 2
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    
     options.add_experimental_option("prefs", prefs)
     
+    # Persistent profile - HTTP/JS caches and consent state survive between runs
+    if Config.CHROME_PROFILE_DIR:
+        profile_dir = os.path.abspath(os.path.join(Config.CHROME_PROFILE_DIR, f"worker_{worker_id}"))
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    
     # ScrapingBee proxy configuration
     if use_proxy:
         api_key = Config.SCRAPINGBEE_API_KEY
@@ -453,7 +630,8 @@ def setup_driver_with_scrapingbee(use_proxy=True):
         params.append(f"render_js={str(Config.SCRAPINGBEE_RENDER_JS).lower()}")
         params.append(f"premium_proxy={str(Config.SCRAPINGBEE_PREMIUM).lower()}")
         params.append(f"country_code={Config.SCRAPINGBEE_COUNTRY}")
-        params.append(f"wait={Config.SCRAPINGBEE_WAIT}")
+        if Config.SCRAPINGBEE_WAIT:
+            params.append(f"wait={Config.SCRAPINGBEE_WAIT}")
         params.append("block_ads=true")
         
         proxy_password = "&".join(params)
@@ -464,16 +642,23 @@ def setup_driver_with_scrapingbee(use_proxy=True):
         print("  ✓ Direct connection (no proxy)")
     
     options.add_experimental_option("useAutomationExtension", False)
+    options.page_load_strategy = Config.PAGE_LOAD_STRATEGY
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
     
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
+    global _CHROMEDRIVER_PATH, _CHROME_BINARY
+    if _CHROME_BINARY and not options.binary_location:
+        options.binary_location = _CHROME_BINARY  # e.g. a Chrome for Testing build Selenium Manager downloaded
+    service = Service(get_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=options)
+    # Later pool workers and restarts skip the Selenium Manager lookup
+    _CHROMEDRIVER_PATH = service.path
+    _CHROME_BINARY = options.binary_location or None
     
     driver.implicitly_wait(Config.IMPLICIT_WAIT)
     driver.set_page_load_timeout(Config.PAGE_LOAD_TIMEOUT)
     driver.maximize_window()
+    _apply_perf_prefs(driver)
+    _apply_stealth(driver)
     
     return driver
 
@@ -486,53 +671,149 @@ class WaitHelpers:
 
     def __init__(self, driver, timeout=15):
         self.driver = driver
-        self.wait = WebDriverWait(driver, timeout)
+        self._waits = {}
+        self.wait = self.waiter(timeout)
 
-    def wait_for_visible(self, locator, retries=2):
-        """Wait for element with retry logic"""
-        for attempt in range(retries):
-            try:
-                return self.wait.until(EC.visibility_of_element_located(locator))
-            except (TimeoutException, StaleElementReferenceException):
-                if attempt < retries - 1:
-                    time.sleep(0.5)
-                    continue
-                return None
+    def waiter(self, timeout=None, poll_frequency=0.1):
+        """
+        Shared WebDriverWait for a timeout/poll pair - built once per driver
+        Missing or stale elements just mean "not yet", so they're ignored while polling
+        """
+        key = (timeout or Config.STEP_TIMEOUT, poll_frequency)
+        if key not in self._waits:
+            self._waits[key] = WebDriverWait(
+                self.driver,
+                key[0],
+                poll_frequency=poll_frequency,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException),
+            )
+        return self._waits[key]
 
-    def wait_for_clickable(self, locator, retries=2):
-        """Wait for element to be clickable"""
-        for attempt in range(retries):
-            try:
-                return self.wait.until(EC.element_to_be_clickable(locator))
-            except (TimeoutException, StaleElementReferenceException):
-                if attempt < retries - 1:
-                    time.sleep(0.5)
-                    continue
-                return None
+    def until_ready(self, locator, timeout=None):
+        """Wait until element is visible - returns as soon as it is, None on timeout"""
+        try:
+            return self.waiter(timeout).until(EC.visibility_of_element_located(locator))
+        except TimeoutException:
+            return None
+
+    def until_any_visible(self, locator, timeout=None):
+        """Wait until any element matching locator is visible - returns the first visible one, None on timeout"""
+        try:
+            return self.waiter(timeout).until(EC.visibility_of_any_elements_located(locator))[0]
+        except TimeoutException:
+            return None
+
+    def until_any(self, *locators, timeout=None, condition=EC.presence_of_element_located):
+        """Wait until any of the locators matches - one wait cycle checks them all, None on timeout"""
+        try:
+            return self.waiter(timeout).until(EC.any_of(*(condition(locator) for locator in locators)))
+        except TimeoutException:
+            return None
+
+    def wait_for_visible(self, locator):
+        """Wait for element to be visible - stale re-renders are retried while polling"""
+        try:
+            return self.wait.until(EC.visibility_of_element_located(locator))
+        except TimeoutException:
+            return None
+
+    def wait_for_clickable(self, locator):
+        """Wait for element to be clickable - stale re-renders are retried while polling"""
+        try:
+            return self.wait.until(EC.element_to_be_clickable(locator))
+        except TimeoutException:
+            return None
 
 
 # =========================================================
 # BASE PAGE
 # =========================================================
 
+# Screenshot PNGs are written to disk off the browser's critical path
+_SCREENSHOT_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Characters not allowed in screenshot filenames
+_SAFE_NAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+# Common booking ID / price patterns on the confirmation page - compiled once
+_BOOKING_ID_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Booking ID[:\s]+([A-Z0-9]{6,})',
+    r'Booking Number[:\s]+([A-Z0-9]{6,})',
+    r'Confirmation Number[:\s]+([A-Z0-9]{6,})',
+    r'Reference[:\s]+([A-Z0-9]{6,})',
+    r'Order ID[:\s]+([A-Z0-9]{6,})',
+))
+_PRICE_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'₹\s*([0-9,]+(?:\.[0-9]{2})?)',
+    r'\bRs\.?\s*([0-9,]+(?:\.[0-9]{2})?)',
+    r'\bINR\s*([0-9,]+(?:\.[0-9]{2})?)',
+    r'Total[:\s]+₹?\s*([0-9,]+(?:\.[0-9]{2})?)',
+))
+
+
+def retry_stale(times=3, delay=0.2):
+    """
+    Re-run a page step when the DOM re-renders under it
+    Only StaleElementReferenceException is retried - the step re-locates its elements on the next attempt
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(times):
+                try:
+                    return fn(*args, **kwargs)
+                except StaleElementReferenceException:
+                    if attempt == times - 1:
+                        raise
+                    print(f"  ⚠️ Page re-rendered - retrying {fn.__name__} ({attempt + 1}/{times - 1})")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
 class BasePage:
 
+    # Stable script sources, values passed as arguments - no per-call string formatting or escaping
+    _CLICK_JS = "arguments[0].click();"
+    _SCROLL_INTO_VIEW_JS = "arguments[0].scrollIntoView(true);"
+    _SCROLL_BY_JS = "window.scrollBy(0, arguments[0]);"
+
     def __init__(self, driver):
         self.driver = driver
         self.wait = WaitHelpers(driver)
+        self._el_cache = {}  # locator -> WebElement, reused across fallback strategies
+
+    def _cached_find(self, locator):
+        """Find element, reusing the cached one while it's still attached to the page"""
+        element = self._el_cache.get(locator)
+        if element is not None:
+            try:
+                element.is_enabled()  # Cheap probe - raises if the page has changed
+                return element
+            except StaleElementReferenceException:
+                del self._el_cache[locator]
+        
+        element = self.find(locator)
+        if element:
+            self._el_cache[locator] = element
+        return element
+
+    def clear_cache(self):
+        """Forget cached elements - call when the browser navigates away"""
+        self._el_cache.clear()
 
     def find(self, locator, retries=2):
-        """Find element with retry"""
+        """Find element with retry - returns immediately, use self.wait to wait for it"""
         for attempt in range(retries):
             try:
                 return self.driver.find_element(*locator)
             except (NoSuchElementException, StaleElementReferenceException):
                 if attempt < retries - 1:
-                    time.sleep(0.3)
                     continue
                 return None
 
     def finds(self, locator):
+        """Find all matching elements - returns immediately, empty list if none"""
         try:
             return self.driver.find_elements(*locator)
         except NoSuchElementException:
@@ -542,21 +823,20 @@ class BasePage:
         """Click element"""
         element = self.wait.wait_for_clickable(locator)
         if element:
+            self._el_cache[locator] = element
             try:
                 element.click()
-                time.sleep(0.5)
                 return True
-            except:
+            except WebDriverException:
                 pass
         
         # JavaScript fallback
         try:
-            element = self.find(locator)
+            element = element or self._cached_find(locator)
             if element:
-                self.driver.execute_script("arguments[0].click();", element)
-                time.sleep(0.5)
+                self.driver.execute_script(self._CLICK_JS, element)
                 return True
-        except:
+        except WebDriverException:
             return False
 
     def type(self, locator, text):
@@ -567,35 +847,57 @@ class BasePage:
                 element.clear()
                 element.send_keys(text)
                 return True
-            except:
+            except WebDriverException:
                 return False
         return False
 
     def scroll_to(self, locator):
         """Scroll to element"""
-        element = self.find(locator)
+        element = self._cached_find(locator)
         if element:
-            self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-            time.sleep(0.3)
+            self.driver.execute_script(self._SCROLL_INTO_VIEW_JS, element)
+
+    def _cdp_eval(self, script, *args):
+        """
+        Run a script that returns plain values (no elements) via CDP Runtime.evaluate
+        Skips WebDriver's execute/sync wrapping - falls back to execute_script on non-Chromium drivers
+        """
+        if not hasattr(self.driver, "execute_cdp_cmd"):
+            return self.driver.execute_script(script, *args)
+        
+        expression = f"(function() {{ {script} }}).apply(null, {json.dumps(args)})"
+        result = self.driver.execute_cdp_cmd("Runtime.evaluate", {"expression": expression, "returnByValue": True})
+        if "exceptionDetails" in result:
+            raise JavascriptException(result["exceptionDetails"].get("text", "Script error"))
+        return result.get("result", {}).get("value")
+
+    def body_text(self):
+        """Rendered text of the page - a fraction of the page source's size, no markup to skip over"""
+        return self._cdp_eval("return document.body ? document.body.innerText : '';") or ""
 
     def scroll_by(self, pixels):
         """Scroll by pixels"""
-        self.driver.execute_script(f"window.scrollBy(0,{pixels});")
-        time.sleep(0.3)
+        self.driver.execute_script(self._SCROLL_BY_JS, pixels)
 
     def screenshot(self, name):
-        """Take screenshot"""
-        if not os.path.exists(Config.SCREENSHOT_PATH):
-            os.makedirs(Config.SCREENSHOT_PATH)
-        
+        """Take screenshot - PNG is captured now, written to Config.SCREENSHOT_PATH in the background"""
         # Sanitize filename - remove special characters
-        import re
-        safe_name = re.sub(r'[<>:"/\\|?*]', '_', name)
+        safe_name = _SAFE_NAME_RE.sub('_', name)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         path = f"{Config.SCREENSHOT_PATH}{safe_name}_{timestamp}.png"
-        self.driver.save_screenshot(path)
-        print(f"  📸 Screenshot: {path}")
+        png = self.driver.get_screenshot_as_png()
+        future = _SCREENSHOT_EXECUTOR.submit(Path(path).write_bytes, png)
+        
+        # Report once the write has actually finished - a full disk or bad path must not pass silently
+        def report(done):
+            error = done.exception()
+            if error:
+                print(f"  ✗ Screenshot not saved ({path}): {error}")
+            else:
+                print(f"  📸 Screenshot: {path}")
+        
+        future.add_done_callback(report)
         return path
 
 
@@ -606,24 +908,19 @@ class BasePage:
 class HotelPage(BasePage):
 
     BOOK_NOW = (By.CSS_SELECTOR, ".appBtn.filled.large.bkngOption__cta.fullWidth")
-    BOOK_NOW_ALT = (By.XPATH, "//button[contains(@class,'bkngOption__cta')]")
+    BOOK_NOW_ALT = (By.CSS_SELECTOR, "button[class*='bkngOption__cta']")
 
     def click_book_now(self):
         """Click Book Now"""
         print("\n[Step 1] Clicking Book Now...")
         try:
-            time.sleep(3)
-            self.scroll_by(500)
-            time.sleep(1.5)
-            
+            # click() waits for the button to become clickable and scrolls it into view
             if self.click(self.BOOK_NOW):
                 print("  ✓ Book Now clicked")
-                time.sleep(2)
                 return True
             
             if self.click(self.BOOK_NOW_ALT):
                 print("  ✓ Book Now clicked (alt)")
-                time.sleep(2)
                 return True
             
             print("  ✗ Book Now not found")
@@ -645,69 +942,204 @@ class BookingPage(BasePage):
     EMAIL = (By.ID, "email")
     MOBILE = (By.ID, "mNo")
     
+    # Fills inputs by id through the native value setter (so React sees the change) - returns ids not found
+    _FILL_FIELDS_JS = """
+        const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+        const missing = [];
+        for (const [id, val] of Object.entries(arguments[0])) {
+            const el = document.getElementById(id);
+            if (!el) { missing.push(id); continue; }
+            el.focus();
+            setValue.call(el, val);
+            el.dispatchEvent(new Event('input', { bubbles: true }));
+            el.dispatchEvent(new Event('change', { bubbles: true }));
+            el.dispatchEvent(new Event('blur', { bubbles: true }));
+        }
+        return missing;
+    """
+    
     # Payment elements
     PAY_NOW = (By.CSS_SELECTOR, ".btnContinuePayment.primaryBtn.capText")
-    PAY_NOW_ALT = (By.XPATH, "//button[contains(@class,'btnContinuePayment')]")
+    PAY_NOW_ALT = (By.CSS_SELECTOR, "button[class*='btnContinuePayment']")
+    # Case-insensitive 'pay now' in one XPath pass
+    PAY_NOW_TEXT = (By.XPATH, "//button[contains(translate(normalize-space(text()),"
+                              "'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'pay now')]")
     
     # UPI elements
     UPI_CONTAINER = (By.CSS_SELECTOR, ".paymode__container__038c1.make-flex.align-center.gap12")
     UPI_INPUT_TESTID = (By.CSS_SELECTOR, "[data-testid='upi-collect-upi-id-input']")
-    UPI_INPUT_NAME = (By.NAME, "UPI_COLLECT|UPI_COLLECT|efb0975372e3")
-    UPI_INPUT_ID = (By.ID, "UPI_COLLECT|UPI_COLLECT|efb0975372e3")
     UPI_SEND_BUTTON = (By.CSS_SELECTOR, ".upiCollectForm__buttonClass__bd48b.cursor-pointer.make-flex.perfect-center.noshrink.lato-bold.font16.border-none.width100.white-text")
     
-    # Payment confirmation/decline indicators
-    PAYMENT_SUCCESS_INDICATORS = [
-        (By.XPATH, "//*[contains(text(), 'Payment Successful')]"),
-        (By.XPATH, "//*[contains(text(), 'payment successful')]"),
-        (By.XPATH, "//*[contains(text(), 'Payment Complete')]"),
-        (By.XPATH, "//*[contains(text(), 'Confirmed')]"),
-        (By.XPATH, "//*[contains(text(), 'confirmed')]"),
-        (By.CSS_SELECTOR, ".payment-success"),
-        (By.CSS_SELECTOR, ".success-message"),
-    ]
+    # Fills the first input whose id/name/data-testid mentions UPI through the native value setter
+    # (a plain .value assignment is ignored by React) - returns true if one was found
+    _FILL_UPI_JS = """
+        const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+        for (const i of document.querySelectorAll('input')) {
+            const key = ((i.id || '') + '|' + (i.name || '') + '|' + (i.getAttribute('data-testid') || '')).toLowerCase();
+            if (key.includes('upi')) {
+                i.scrollIntoView(true);
+                i.focus();
+                setValue.call(i, arguments[0]);
+                i.dispatchEvent(new Event('input', { bubbles: true }));
+                i.dispatchEvent(new Event('change', { bubbles: true }));
+                return true;
+            }
+        }
+        return false;
+    """
     
-    PAYMENT_PENDING_INDICATORS = [
-        (By.XPATH, "//*[contains(text(), 'Waiting for payment')]"),
-        (By.XPATH, "//*[contains(text(), 'Pending')]"),
-        (By.XPATH, "//*[contains(text(), 'pending')]"),
-        (By.XPATH, "//*[contains(text(), 'Processing')]"),
-    ]
+    # Lowercase keywords - matched against lowercased text/attributes in the page
+    _SUCCESS_KEYWORDS = ('payment successful', 'payment complete', 'booking confirmed', 'transaction successful', 'confirmed')
+    _FAILURE_KEYWORDS = ('payment failed', 'transaction failed', 'payment declined', 'payment cancelled')
+    _PAY_BTN_KEYWORDS = ('pay',)
+    _SEND_BTN_KEYWORDS = ('send', 'payment', 'request')
+    _CLOSE_ATTR_KEYWORDS = ('close',)
+    # Failure keywords only count inside these - FAQ/help text elsewhere on the page often mentions them
+    _ERROR_CONTAINERS = ".payment-failure, .payment-error, .error-message, [role='alert']"
+    
+    # Installs (once per document) a MutationObserver that records the first success or decline
+    # it sees in window.__paymentStatus - returns {status, message}, null if nothing yet
+    # A success hit always wins; a decline needs a failure keyword inside a visible error container
+    _STATUS_JS = """
+        if (!window.__paymentObserver && document.body) {
+            const [successKws, failureKws, errorSelector] = arguments;
+            const check = () => {
+                const banner = document.querySelector('.payment-success, .success-message');
+                if (banner && banner.offsetParent !== null) {
+                    window.__paymentStatus = { status: 'success', message: (banner.innerText || '').trim() || 'Payment confirmed' };
+                } else {
+                    const text = document.body.innerText.toLowerCase();
+                    const confirmed = successKws.find(k => text.includes(k));
+                    const errorText = Array.from(document.querySelectorAll(errorSelector))
+                        .filter(el => el.offsetParent !== null)
+                        .map(el => (el.innerText || '').toLowerCase()).join(' ');
+                    const failed = failureKws.find(k => errorText.includes(k));
+                    window.__paymentStatus = confirmed ? { status: 'success', message: confirmed }
+                        : failed ? { status: 'declined', message: failed } : null;
+                }
+                if (window.__paymentStatus) window.__paymentObserver.disconnect();
+            };
+            window.__paymentStatus = null;
+            window.__paymentObserver = new MutationObserver(check);
+            window.__paymentObserver.observe(document.body, { childList: true, subtree: true, characterData: true });
+            check();
+        }
+        return window.__paymentStatus || null;
+    """
     
     # Popup close button
-    CLOSE_POPUP = (By.CSS_SELECTOR, ".close[data-testid='closeButtonClick'][data-cy='closeButtonClick_']")
-    CLOSE_POPUP_ALT = (By.CSS_SELECTOR, "[data-testid='closeButtonClick']")
-    CLOSE_POPUP_ALT2 = (By.CSS_SELECTOR, "[data-cy='closeButtonClick_']")
-    CLOSE_POPUP_ALT3 = (By.CSS_SELECTOR, ".close")
+    CLOSE_POPUP = (By.CSS_SELECTOR, "[data-testid='closeButtonClick'], [data-cy='closeButtonClick_'], .close")
     
     # Booking ID element
     BOOKING_ID = (By.CSS_SELECTOR, ".latoBlack.blackText")
-    BOOKING_ID_ALT = (By.XPATH, "//*[contains(@class, 'latoBlack') and contains(@class, 'blackText')]")
+    BOOKING_ID_ALT = (By.CSS_SELECTOR, "[class*='latoBlack'][class*='blackText']")
     
     # Price element
     PRICE = (By.CSS_SELECTOR, ".latoBlack.font22.dirLeft")
-    PRICE_ALT = (By.XPATH, "//*[contains(@class, 'latoBlack') and contains(@class, 'font22') and contains(@class, 'dirLeft')]")
+    PRICE_ALT = (By.CSS_SELECTOR, "[class*='latoBlack'][class*='font22'][class*='dirLeft']")
+    
+    # Text tests for the confirmation page (JS RegExp sources) - built once, not per candidate
+    _HAS_DIGIT = r"\d"
+    _ID_LIKE = r"^(?=[\s\S]*\d)[\s\S]{6,}$"  # At least 6 characters, one of them a digit
+    # Rs/INR only as whole words - a bare 'rs' would match "Travellers", "hours", "Offers"
+    _CURRENCY = r"₹|\bRs\.?(?=\s*\d)|\bINR\b"
+    _PRICE_LIKE = r"\d|" + _CURRENCY  # Contains numbers or a currency marker
+    _HAS_CURRENCY_AND_DIGIT = r"^(?=[\s\S]*(" + _CURRENCY + r"))(?=[\s\S]*\d)"
+    
+    # [selector, pattern, flags, visibleOnly] - visible primary/alt selectors first, broad class scans last
+    _CONFIRMATION_RULES = (
+        (BOOKING_ID[1], _HAS_DIGIT, "", True),
+        (BOOKING_ID_ALT[1], _HAS_DIGIT, "", True),
+        ("[class*='latoBlack']", _ID_LIKE, "", False),
+        (PRICE[1], _PRICE_LIKE, "i", True),
+        (PRICE_ALT[1], _PRICE_LIKE, "i", True),
+        ("[class*='price'], [class*='amount'], [class*='total']", _HAS_CURRENCY_AND_DIGIT, "i", False),
+    )
+    
+    # Brings an off-screen element to the middle of the viewport, then clicks it
+    _CENTER_AND_CLICK_JS = "arguments[0].scrollIntoView({behavior: 'instant', block: 'center'}); arguments[0].click();"
+    
+    # Scans every button in one call - returns [element, text] for the first keyword match
+    _FIND_BUTTON_JS = """
+        const kws = arguments[0], byAttr = arguments[1];
+        for (const b of document.querySelectorAll('button')) {
+            const hay = (byAttr
+                ? ((b.getAttribute('data-testid') || '') + ' ' + (b.getAttribute('data-cy') || '') + ' ' + (b.className || ''))
+                : (b.innerText || '')).toLowerCase();
+            if (kws.some(k => hay.includes(k))) return [b, (b.innerText || '').trim()];
+        }
+        return null;
+    """
+
+    def _find_button_by_keywords(self, keywords, by_attribute=False):
+        """
+        Find first button whose text (or data-testid/data-cy/class) contains a keyword
+        Returns: tuple (element, text) or (None, None)
+        """
+        try:
+            match = self.driver.execute_script(self._FIND_BUTTON_JS, keywords, by_attribute)
+        except WebDriverException:
+            match = None
+        return tuple(match) if match else (None, None)
+
+    # For each [selector, pattern, flags, visibleOnly] rule, the first matching element's trimmed text, null if none
+    _FIRST_TEXTS_JS = """
+        const isVisible = e => {
+            const r = e.getBoundingClientRect(), st = getComputedStyle(e);
+            return r.width > 0 && r.height > 0 && st.visibility !== 'hidden' && st.display !== 'none';
+        };
+        return arguments[0].map(([selector, pattern, flags, visibleOnly]) => {
+            const re = new RegExp(pattern, flags);
+            for (const e of document.querySelectorAll(selector)) {
+                // Text test first - style/layout is only computed for elements that could be the answer
+                const t = (e.innerText || '').trim();
+                if (t && re.test(t) && (!visibleOnly || isVisible(e))) return t;
+            }
+            return null;
+        });
+    """
+
+    def _first_texts(self, rules):
+        """
+        Scan several CSS selectors in one call, filtering visibility and text in the browser
+        Returns: list with the first matching text (or None) per rule
+        """
+        try:
+            return self._cdp_eval(self._FIRST_TEXTS_JS, rules)
+        except WebDriverException:
+            return [None] * len(rules)
+
+    def _js_click(self, element):
+        """Click element via JavaScript - returns True on success, stale elements raise for @retry_stale"""
+        try:
+            self.driver.execute_script(self._CLICK_JS, element)
+            return True
+        except JavascriptException:
+            return False
 
-    def enter_guest_details(self):
+    def enter_guest_details(self, booking):
         """Enter guest details"""
         print("\n[Step 2] Entering guest details...")
         try:
-            time.sleep(3)
-            
-            if self.type(self.FIRST_NAME, Config.GUEST_FIRST_NAME):
-                print(f"  ✓ First Name: {Config.GUEST_FIRST_NAME}")
-            
-            time.sleep(0.5)
-            if self.type(self.LAST_NAME, Config.GUEST_LAST_NAME):
-                print(f"  ✓ Last Name: {Config.GUEST_LAST_NAME}")
+            # Form is ready once the first field is visible
+            self.wait.until_ready(self.FIRST_NAME)
+            
+            fields = [
+                (self.FIRST_NAME, 'First Name', booking.first_name),
+                (self.LAST_NAME, 'Last Name', booking.last_name),
+                (self.EMAIL, 'Email', booking.email),
+                (self.MOBILE, 'Mobile', booking.mobile),
+            ]
             
-            time.sleep(0.5)
-            if self.type(self.EMAIL, Config.GUEST_EMAIL):
-                print(f"  ✓ Email: {Config.GUEST_EMAIL}")
+            # Fill all four fields in one round-trip
+            missing = self._cdp_eval(
+                self._FILL_FIELDS_JS, {locator[1]: str(value) for locator, _, value in fields}
+            )
             
-            time.sleep(0.5)
-            if self.type(self.MOBILE, Config.GUEST_MOBILE):
-                print(f"  ✓ Mobile: {Config.GUEST_MOBILE}")
+            for locator, label, value in fields:
+                # Selenium fallback for any field the script couldn't find
+                if locator[1] not in missing or self.type(locator, value):
+                    print(f"  ✓ {label}: {value}")
             
             return True
         except Exception as e:
@@ -719,51 +1151,23 @@ class BookingPage(BasePage):
         print("\n[Step 3] Looking for Pay Now button...")
         
         try:
-            time.sleep(3)
-            
-            pay_now_selectors = [
-                self.PAY_NOW,
-                self.PAY_NOW_ALT,
-                (By.XPATH, "//button[contains(text(),'Pay Now')]"),
-                (By.XPATH, "//button[contains(text(),'pay now')]"),
-            ]
+            # Present in the DOM is enough - scrollIntoView brings it on screen however far down it is
+            element = self.wait.until_any(
+                self.PAY_NOW, self.PAY_NOW_ALT, self.PAY_NOW_TEXT
+            )
             
-            for scroll_amount in [300, 600, 900]:
-                self.scroll_by(scroll_amount)
-                time.sleep(0.5)
-                
-                for i, selector in enumerate(pay_now_selectors):
-                    try:
-                        element = self.find(selector)
-                        if element and element.is_displayed():
-                            try:
-                                element.click()
-                                print("  ✓ Pay Now clicked")
-                                time.sleep(2)
-                                return True
-                            except:
-                                pass
-                            
-                            try:
-                                self.driver.execute_script("arguments[0].click();", element)
-                                print("  ✓ Pay Now clicked (JS)")
-                                time.sleep(2)
-                                return True
-                            except:
-                                pass
-                    except:
-                        continue
-            
-            all_buttons = self.finds((By.TAG_NAME, "button"))
-            for btn in all_buttons:
+            if element:
                 try:
-                    if "pay" in btn.text.lower():
-                        self.driver.execute_script("arguments[0].click();", btn)
-                        print(f"  ✓ Clicked: '{btn.text}'")
-                        time.sleep(2)
-                        return True
-                except:
-                    continue
+                    self.driver.execute_script(self._CENTER_AND_CLICK_JS, element)
+                    print("  ✓ Pay Now clicked")
+                    return True
+                except JavascriptException:
+                    pass
+            
+            btn, btn_text = self._find_button_by_keywords(self._PAY_BTN_KEYWORDS)
+            if btn and self._js_click(btn):
+                print(f"  ✓ Clicked: '{btn_text}'")
+                return True
             
             print("  ✗ Pay Now button not found")
             self.screenshot("pay_now_not_found")
@@ -778,17 +1182,14 @@ class BookingPage(BasePage):
         print("\n[Step 4] Selecting UPI payment method...")
         
         try:
-            time.sleep(3)
-            
             upi_element = self.wait.wait_for_visible(self.UPI_CONTAINER)
             
             if upi_element:
+                self._el_cache[self.UPI_CONTAINER] = upi_element
                 self.scroll_to(self.UPI_CONTAINER)
-                time.sleep(0.5)
                 
                 if self.click(self.UPI_CONTAINER):
                     print("  ✓ UPI payment method selected")
-                    time.sleep(1)
                     return True
             
             upi_elements = self.finds((By.CSS_SELECTOR, ".paymode__container__038c1"))
@@ -796,11 +1197,10 @@ class BookingPage(BasePage):
             for elem in upi_elements:
                 try:
                     if "upi" in elem.text.lower():
-                        self.driver.execute_script("arguments[0].click();", elem)
+                        self.driver.execute_script(self._CLICK_JS, elem)
                         print("  ✓ UPI selected (text match)")
-                        time.sleep(1)
                         return True
-                except:
+                except WebDriverException:
                     continue
             
             print("  ✗ UPI payment method not found")
@@ -811,155 +1211,76 @@ class BookingPage(BasePage):
             print(f"  ✗ Error: {e}")
             return False
 
-    def enter_upi_id(self):
+    @retry_stale()
+    def enter_upi_id(self, upi_id):
         """Enter UPI ID - tries multiple locator strategies"""
         print("\n[Step 5] Entering UPI ID...")
         
         try:
-            time.sleep(3)
-            
             # Strategy 1: data-testid
             upi_input = self.wait.wait_for_visible(self.UPI_INPUT_TESTID)
             
             if upi_input:
+                self._el_cache[self.UPI_INPUT_TESTID] = upi_input
                 self.scroll_to(self.UPI_INPUT_TESTID)
-                time.sleep(0.5)
                 
                 try:
                     upi_input.clear()
-                    upi_input.send_keys(Config.UPI_ID)
-                    print(f"  ✓ UPI ID entered: {Config.UPI_ID}")
-                    time.sleep(1)
+                    upi_input.send_keys(upi_id)
+                    print(f"  ✓ UPI ID entered: {upi_id}")
                     return True
-                except Exception as e:
+                except InvalidElementStateException as e:
                     print(f"  ⚠️ testid method failed: {e}")
             
-            # Strategy 2: name attribute
-            try:
-                upi_input = self.find(self.UPI_INPUT_NAME)
-                if upi_input and upi_input.is_displayed():
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", upi_input)
-                    time.sleep(0.5)
-                    upi_input.clear()
-                    upi_input.send_keys(Config.UPI_ID)
-                    print(f"  ✓ UPI ID entered: {Config.UPI_ID}")
-                    time.sleep(1)
-                    return True
-            except:
-                pass
-            
-            # Strategy 3: ID attribute
-            try:
-                upi_input = self.find(self.UPI_INPUT_ID)
-                if upi_input and upi_input.is_displayed():
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", upi_input)
-                    time.sleep(0.5)
-                    upi_input.clear()
-                    upi_input.send_keys(Config.UPI_ID)
-                    print(f"  ✓ UPI ID entered: {Config.UPI_ID}")
-                    time.sleep(1)
-                    return True
-            except:
-                pass
-            
-            # Strategy 4: Generic search
-            all_inputs = self.finds((By.TAG_NAME, "input"))
-            
-            for inp in all_inputs:
-                try:
-                    inp_id = inp.get_attribute("id") or ""
-                    inp_name = inp.get_attribute("name") or ""
-                    inp_testid = inp.get_attribute("data-testid") or ""
-                    
-                    if ("upi" in inp_id.lower() or "upi" in inp_name.lower() or "upi" in inp_testid.lower()):
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", inp)
-                        time.sleep(0.5)
-                        inp.clear()
-                        inp.send_keys(Config.UPI_ID)
-                        print(f"  ✓ UPI ID entered: {Config.UPI_ID}")
-                        time.sleep(1)
-                        return True
-                except:
-                    continue
-            
-            # Strategy 5: JavaScript
-            js_selectors = [
-                "[data-testid='upi-collect-upi-id-input']",
-                "input[name*='UPI_COLLECT']",
-                "input[id*='UPI_COLLECT']"
-            ]
-            
-            for selector in js_selectors:
-                script = f"""
-                    var input = document.querySelector("{selector}");
-                    if (input) {{
-                        input.value = '{Config.UPI_ID}';
-                        input.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                        input.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                        return true;
-                    }}
-                    return false;
-                """
-                
-                result = self.driver.execute_script(script)
-                if result:
-                    print(f"  ✓ UPI ID entered (JavaScript): {Config.UPI_ID}")
-                    time.sleep(1)
-                    return True
+            # Strategy 2: any input whose id/name/data-testid mentions UPI - one in-page scan, filled via JS
+            if self._cdp_eval(self._FILL_UPI_JS, upi_id):
+                print(f"  ✓ UPI ID entered (JavaScript): {upi_id}")
+                return True
             
             print("  ✗ UPI input field not found")
             self.screenshot("upi_input_not_found")
             return False
             
+        except StaleElementReferenceException:
+            raise  # Let @retry_stale re-run the step
         except Exception as e:
             print(f"  ✗ Error: {e}")
             return False
 
+    @retry_stale()
     def send_payment_request(self):
         """Click Send Payment Request button"""
         print("\n[Step 6] Sending payment request...")
         
         try:
-            time.sleep(2)
-            
             send_button = self.wait.wait_for_clickable(self.UPI_SEND_BUTTON)
             
             if send_button:
+                self._el_cache[self.UPI_SEND_BUTTON] = send_button
                 self.scroll_to(self.UPI_SEND_BUTTON)
-                time.sleep(0.5)
                 
-                if self.click(self.UPI_SEND_BUTTON):
+                try:
+                    send_button.click()
                     print("  ✓ Payment request sent!")
-                    time.sleep(2)
                     return True
-                
-                try:
-                    btn = self.find(self.UPI_SEND_BUTTON)
-                    if btn:
-                        self.driver.execute_script("arguments[0].click();", btn)
-                        print("  ✓ Payment request sent (JS)")
-                        time.sleep(2)
-                        return True
-                except:
+                except (ElementClickInterceptedException, ElementNotInteractableException):
                     pass
+                
+                if self._js_click(send_button):
+                    print("  ✓ Payment request sent (JS)")
+                    return True
             
-            all_buttons = self.finds((By.TAG_NAME, "button"))
-            
-            for btn in all_buttons:
-                try:
-                    btn_text = btn.text.lower()
-                    if "send" in btn_text or "payment" in btn_text or "request" in btn_text:
-                        self.driver.execute_script("arguments[0].click();", btn)
-                        print(f"  ✓ Clicked: '{btn.text}'")
-                        time.sleep(2)
-                        return True
-                except:
-                    continue
+            btn, btn_text = self._find_button_by_keywords(self._SEND_BTN_KEYWORDS)
+            if btn and self._js_click(btn):
+                print(f"  ✓ Clicked: '{btn_text}'")
+                return True
             
             print("  ✗ Send payment button not found")
             self.screenshot("send_button_not_found")
             return False
             
+        except StaleElementReferenceException:
+            raise  # Let @retry_stale re-run the step
         except Exception as e:
             print(f"  ✗ Error: {e}")
             return False
@@ -969,74 +1290,61 @@ class BookingPage(BasePage):
         Wait for payment confirmation for 30 seconds
         Does NOT take screenshot - that happens later with booking ID
         Returns: tuple (status, message)
-            status: 'success' or 'timeout'
+            status: 'success', 'declined', 'timeout' or 'error'
             message: descriptive message
         """
         print("\n[Step 7] Waiting for payment confirmation...")
         print(f"  ⏳ Waiting for {Config.PAYMENT_WAIT_TIMEOUT} seconds")
-        print(f"  🔄 Checking every {Config.PAYMENT_CHECK_INTERVAL} seconds")
+        print(f"  🔄 Checking from every {Config.PAYMENT_CHECK_INTERVAL}s up to every {Config.PAYMENT_CHECK_MAX_INTERVAL}s")
         
-        start_time = time.time()
-        check_count = 0
-        payment_confirmed = False
+        # Clock starts now - the payment request has just been sent
+        start_time = time.monotonic()
+        deadline = start_time + Config.PAYMENT_WAIT_TIMEOUT
+        delay = Config.PAYMENT_CHECK_INTERVAL
+        next_report = 10
         
         try:
-            while (time.time() - start_time) < Config.PAYMENT_WAIT_TIMEOUT:
-                check_count += 1
-                elapsed = int(time.time() - start_time)
+            while True:
+                # Observer does the DOM work in the page - this just reads its flag
+                # (and re-installs it if a navigation replaced the document)
+                hit = self._cdp_eval(
+                    self._STATUS_JS, self._SUCCESS_KEYWORDS, self._FAILURE_KEYWORDS, self._ERROR_CONTAINERS
+                )
+                elapsed = int(time.monotonic() - start_time)
                 
-                if check_count % 2 == 0:  # Print every 10 seconds (2 checks * 5 seconds)
-                    remaining = Config.PAYMENT_WAIT_TIMEOUT - elapsed
-                    print(f"  ⏱️  Waiting... ({elapsed}s elapsed, {remaining}s remaining)")
+                if hit and hit['status'] == 'success':
+                    print(f"\n  ✅ PAYMENT CONFIRMED!")
+                    print(f"     Message: {hit['message']}")
+                    print(f"  ✅ Payment confirmed in {elapsed} seconds")
+                    return 'success', f"Payment confirmed in {elapsed} seconds"
                 
-                # Check for success indicators
-                for indicator in self.PAYMENT_SUCCESS_INDICATORS:
-                    try:
-                        element = self.find(indicator)
-                        if element and element.is_displayed():
-                            success_text = element.text if element.text else "Payment confirmed"
-                            print(f"\n  ✅ PAYMENT CONFIRMED!")
-                            print(f"     Message: {success_text}")
-                            payment_confirmed = True
-                            break
-                    except:
-                        continue
+                if hit:
+                    # Declined - no point waiting out the rest of the timeout
+                    print(f"\n  ❌ PAYMENT DECLINED after {elapsed} seconds")
+                    print(f"     Message: {hit['message']}")
+                    return 'declined', f"Payment declined ({hit['message']})"
                 
-                if payment_confirmed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     break
                 
-                # Check page source for keywords as fallback
-                page_source = self.driver.page_source.lower()
-                success_keywords = ['payment successful', 'payment complete', 'booking confirmed', 'transaction successful']
+                if elapsed >= next_report:  # Print every 10 seconds
+                    print(f"  ⏱️  Waiting... ({elapsed}s elapsed, {int(remaining)}s remaining)")
+                    next_report += 10
                 
-                for keyword in success_keywords:
-                    if keyword in page_source:
-                        print(f"\n  ✅ PAYMENT CONFIRMED (detected via page source)")
-                        print(f"     Keyword found: {keyword}")
-                        payment_confirmed = True
-                        break
-                
-                if payment_confirmed:
-                    break
-                
-                # Wait before next check
-                time.sleep(Config.PAYMENT_CHECK_INTERVAL)
+                # Fast checks early when confirmations usually land, cheaper ones later
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, Config.PAYMENT_CHECK_MAX_INTERVAL)
             
-            # After waiting period
-            elapsed = int(time.time() - start_time)
-            
-            if payment_confirmed:
-                print(f"  ✅ Payment confirmed in {elapsed} seconds")
-                return 'success', f"Payment confirmed in {elapsed} seconds"
-            else:
-                print(f"\n  ⏱️  {Config.PAYMENT_WAIT_TIMEOUT} seconds elapsed")
-                print(f"  ℹ️  Payment status unknown - will check after popup close")
-                return 'timeout', f"Waited {Config.PAYMENT_WAIT_TIMEOUT} seconds - status unknown"
+            print(f"\n  ⏱️  {Config.PAYMENT_WAIT_TIMEOUT} seconds elapsed")
+            print(f"  ℹ️  Payment status unknown - will check after popup close")
+            return 'timeout', f"Waited {Config.PAYMENT_WAIT_TIMEOUT} seconds - status unknown"
             
         except Exception as e:
             print(f"\n  ❌ ERROR while waiting for payment: {e}")
             return 'error', f"Error while waiting: {str(e)}"
 
+    @retry_stale()
     def close_popup_if_present(self):
         """
         Close popup if it appears after payment confirmation
@@ -1045,133 +1353,101 @@ class BookingPage(BasePage):
         print("\n[Step 8] Checking for popup...")
         
         try:
-            time.sleep(2)  # Wait for potential popup to appear
-            
-            # Try multiple selectors
-            close_selectors = [
-                self.CLOSE_POPUP,
-                self.CLOSE_POPUP_ALT,
-                self.CLOSE_POPUP_ALT2,
-                self.CLOSE_POPUP_ALT3,
-            ]
+            # Give a popup a moment to appear - returns as soon as one does
+            # Any visible match counts: a hidden '.close' earlier in the DOM must not mask a visible button
+            close_button = self.wait.until_any_visible(self.CLOSE_POPUP, timeout=Config.POPUP_TIMEOUT)
             
-            for selector in close_selectors:
+            if close_button:
+                print(f"  ✓ Popup found - closing it...")
+                
+                # Try clicking
                 try:
-                    close_button = self.find(selector)
-                    if close_button and close_button.is_displayed():
-                        print(f"  ✓ Popup found - closing it...")
-                        
-                        # Try clicking
-                        try:
-                            close_button.click()
-                            time.sleep(1)
-                            print(f"  ✓ Popup closed successfully")
-                            return True
-                        except:
-                            # JavaScript fallback
-                            self.driver.execute_script("arguments[0].click();", close_button)
-                            time.sleep(1)
-                            print(f"  ✓ Popup closed successfully (JS)")
-                            return True
-                except:
-                    continue
+                    close_button.click()
+                    print(f"  ✓ Popup closed successfully")
+                    return True
+                except (ElementClickInterceptedException, ElementNotInteractableException):
+                    pass
+                
+                # JavaScript fallback
+                if self._js_click(close_button):
+                    print(f"  ✓ Popup closed successfully (JS)")
+                    return True
             
             # Try finding any close button with common attributes
-            all_buttons = self.finds((By.TAG_NAME, "button"))
-            for btn in all_buttons:
-                try:
-                    data_testid = btn.get_attribute("data-testid") or ""
-                    data_cy = btn.get_attribute("data-cy") or ""
-                    class_name = btn.get_attribute("class") or ""
-                    
-                    if ("close" in data_testid.lower() or 
-                        "close" in data_cy.lower() or 
-                        "close" in class_name.lower()):
-                        self.driver.execute_script("arguments[0].click();", btn)
-                        time.sleep(1)
-                        print(f"  ✓ Popup closed (found close button)")
-                        return True
-                except:
-                    continue
+            btn, _ = self._find_button_by_keywords(self._CLOSE_ATTR_KEYWORDS, by_attribute=True)
+            if btn and self._js_click(btn):
+                print(f"  ✓ Popup closed (found close button)")
+                return True
             
             print(f"  ℹ️  No popup found - continuing...")
             return False
             
+        except StaleElementReferenceException:
+            raise  # Let @retry_stale re-run the step
         except Exception as e:
             print(f"  ⚠️  Error checking for popup: {e}")
             return False
 
-    def extract_booking_id(self):
+    def extract_confirmation(self):
         """
-        Extract booking ID from the confirmation page
+        Extract booking ID and price from the confirmation page in one scrape
         Takes ONE screenshot at the end with booking ID as filename
-        Returns: booking_id (string) or None
+        Returns: tuple (booking_id, price) - either may be None
         """
-        print("\n[Step 9] Extracting Booking ID...")
+        print("\n[Step 9] Extracting Booking ID and Price...")
+        
+        booking_id = None
+        price = None
         
         try:
-            time.sleep(2)  # Wait for page to load
+            # Wait for the confirmation page - returns as soon as the ID or price renders
+            self.wait.until_any(self.BOOKING_ID, self.PRICE, condition=EC.visibility_of_element_located)
             
-            booking_id = None
+            # Every candidate in one call
+            id_primary, id_alt, id_broad, price_primary, price_alt, price_broad = self._first_texts(
+                self._CONFIRMATION_RULES
+            )
             
-            # Try primary selector
-            booking_id_selectors = [
-                self.BOOKING_ID,
-                self.BOOKING_ID_ALT,
-            ]
+            booking_id = id_primary or id_alt
+            if booking_id:
+                print(f"  ✓ Booking ID found: {booking_id}")
             
-            for selector in booking_id_selectors:
-                try:
-                    elements = self.finds(selector)
-                    
-                    for element in elements:
-                        if element.is_displayed():
-                            text = element.text.strip()
-                            # Check if it looks like a booking ID (contains numbers/alphanumeric)
-                            if text and any(char.isdigit() for char in text):
-                                print(f"  ✓ Booking ID found: {text}")
-                                booking_id = text
-                                break
-                    
-                    if booking_id:
-                        break
-                except:
-                    continue
+            price = price_primary or price_alt
+            if price:
+                print(f"  ✓ Price found: {price}")
             
-            # Fallback: Search page source for booking ID patterns
-            if not booking_id:
-                print(f"  ℹ️  Searching page source for booking ID...")
-                page_source = self.driver.page_source
+            # Fallback: one visible-text fetch shared by both regex searches
+            if not booking_id or not price:
+                print(f"  ℹ️  Searching page text...")
+                page_text = self.body_text()
                 
-                # Common booking ID patterns
-                import re
-                patterns = [
-                    r'Booking ID[:\s]+([A-Z0-9]{6,})',
-                    r'Booking Number[:\s]+([A-Z0-9]{6,})',
-                    r'Confirmation Number[:\s]+([A-Z0-9]{6,})',
-                    r'Reference[:\s]+([A-Z0-9]{6,})',
-                    r'Order ID[:\s]+([A-Z0-9]{6,})',
-                ]
+                if not booking_id:
+                    for pattern in _BOOKING_ID_RES:
+                        match = pattern.search(page_text)
+                        if match:
+                            booking_id = match.group(1)
+                            print(f"  ✓ Booking ID found (regex): {booking_id}")
+                            break
                 
-                for pattern in patterns:
-                    match = re.search(pattern, page_source, re.IGNORECASE)
-                    if match:
-                        booking_id = match.group(1)
-                        print(f"  ✓ Booking ID found (regex): {booking_id}")
-                        break
-            
-            # Try finding all elements with latoBlack class
-            if not booking_id:
-                all_elements = self.finds((By.CSS_SELECTOR, "[class*='latoBlack']"))
-                for elem in all_elements:
-                    try:
-                        text = elem.text.strip()
-                        if text and len(text) >= 6 and any(char.isdigit() for char in text):
-                            print(f"  ✓ Potential Booking ID: {text}")
-                            booking_id = text
+                if not price:
+                    for pattern in _PRICE_RES:
+                        match = pattern.search(page_text)
+                        if match:
+                            price = f"₹{match.group(1)}"
+                            print(f"  ✓ Price found (regex): {price}")
                             break
-                    except:
-                        continue
+            
+            # Broad class scans
+            if not booking_id and id_broad:
+                print(f"  ✓ Potential Booking ID: {id_broad}")
+                booking_id = id_broad
+            
+            if not price and price_broad:
+                print(f"  ✓ Price found (class search): {price_broad}")
+                price = price_broad
+            
+            if not price:
+                print(f"  ✗ Price not found")
             
             # NOW take the single screenshot
             print(f"\n  📸 Taking final screenshot...")
@@ -1179,136 +1455,62 @@ class BookingPage(BasePage):
                 # Screenshot with booking ID as name
                 self.screenshot(f"booking_id_{booking_id}")
                 print(f"  ✅ Screenshot saved with booking ID: {booking_id}")
-                return booking_id
             else:
                 # Screenshot showing booking ID not found
                 self.screenshot("booking_id_not_found")
                 print(f"  ✗ Booking ID not found")
-                return None
-            
-        except Exception as e:
-            print(f"  ✗ Error extracting booking ID: {e}")
-            self.screenshot("booking_id_error")
-            return None
-
-    def extract_price(self):
-        """
-        Extract booking price from the confirmation page
-        Returns: price (string) or None
-        """
-        print("\n[Step 10] Extracting Price...")
-        
-        try:
-            time.sleep(1)  # Wait briefly
             
-            price = None
-            
-            # Try primary selector
-            price_selectors = [
-                self.PRICE,
-                self.PRICE_ALT,
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    elements = self.finds(selector)
-                    
-                    for element in elements:
-                        if element.is_displayed():
-                            text = element.text.strip()
-                            # Check if it looks like a price (contains numbers and currency symbols)
-                            if text and (any(char.isdigit() for char in text) or '₹' in text or 'Rs' in text.upper()):
-                                print(f"  ✓ Price found: {text}")
-                                price = text
-                                break
-                    
-                    if price:
-                        break
-                except:
-                    continue
-            
-            # Fallback: Search for price in page source
-            if not price:
-                print(f"  ℹ️  Searching page source for price...")
-                page_source = self.driver.page_source
-                
-                # Common price patterns
-                import re
-                patterns = [
-                    r'₹\s*([0-9,]+(?:\.[0-9]{2})?)',
-                    r'Rs\.?\s*([0-9,]+(?:\.[0-9]{2})?)',
-                    r'INR\s*([0-9,]+(?:\.[0-9]{2})?)',
-                    r'Total[:\s]+₹?\s*([0-9,]+(?:\.[0-9]{2})?)',
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, page_source, re.IGNORECASE)
-                    if match:
-                        price = f"₹{match.group(1)}"
-                        print(f"  ✓ Price found (regex): {price}")
-                        break
-            
-            # Try finding elements with price-related classes
-            if not price:
-                price_elements = self.finds((By.CSS_SELECTOR, "[class*='price'], [class*='amount'], [class*='total']"))
-                for elem in price_elements:
-                    try:
-                        text = elem.text.strip()
-                        if text and ('₹' in text or 'Rs' in text.upper()) and any(char.isdigit() for char in text):
-                            print(f"  ✓ Price found (class search): {text}")
-                            price = text
-                            break
-                    except:
-                        continue
-            
-            if price:
-                return price
-            else:
-                print(f"  ✗ Price not found")
-                return None
+            return booking_id, price
             
         except Exception as e:
-            print(f"  ✗ Error extracting price: {e}")
-            return None
+            print(f"  ✗ Error extracting booking details: {e}")
+            self.screenshot("booking_id_error")
+            return booking_id, price
 
 
 # =========================================================
 # BOOKING AUTOMATION
 # =========================================================
 
-def process_single_booking(booking_data, driver, hotel_page, booking_page):
+def process_single_booking(booking, driver, hotel_page, booking_page):
     """Process a single booking"""
     try:
-        print("\n" + "="*70)
-        print(f" PROCESSING BOOKING - Row {booking_data['row_number']}")
-        print("="*70)
-        
-        # Load booking data into Config
-        checkin, checkout = load_booking_from_dict(booking_data)
-        
-        # Display booking details
-        print(f"  Hotel ID: {Config.HOTEL_ID}")
-        print(f"  City: {Config.CITY_CODE}")
-        print(f"  Check-in: {checkin.strftime('%B %d, %Y')}")
-        print(f"  Check-out: {checkout.strftime('%B %d, %Y')}")
-        print(f"  Guests: {Config.ADULTS} adults, {Config.CHILDREN} children")
-        print(f"  Rooms: {Config.ROOMS}")
-        print(f"  Guest: {Config.GUEST_FIRST_NAME} {Config.GUEST_LAST_NAME}")
-        print(f"  UPI ID: {Config.UPI_ID}")
+        # Display booking details - one write instead of a print per line
+        lines = [
+            "\n" + "="*70,
+            f" PROCESSING BOOKING - Row {booking.row_number}",
+            "="*70,
+        ]
+        if Config.VERBOSE:
+            lines += [
+                f"  Hotel ID: {booking.hotel_id}",
+                f"  City: {booking.city_code}",
+                f"  Check-in: {booking.checkin:%B %d, %Y}",
+                f"  Check-out: {booking.checkout:%B %d, %Y}",
+                f"  Guests: {booking.adults} adults, {booking.children} children",
+                f"  Rooms: {booking.rooms}",
+                f"  Guest: {booking.first_name} {booking.last_name}",
+                f"  UPI ID: {booking.upi_id}",
+            ]
+        print("\n".join(lines))
         
         # Build URL and navigate
-        hotel_url = build_hotel_url()
+        hotel_url = build_hotel_url(booking)
         print(f"\n🌐 Opening hotel page...")
         driver.get(hotel_url)
-        time.sleep(5)
+        
+        # Continue the moment Book Now is in the DOM instead of sleeping a fixed 5 seconds
+        book_now = hotel_page.wait.until_any(
+            HotelPage.BOOK_NOW, HotelPage.BOOK_NOW_ALT, timeout=Config.PAGE_LOAD_TIMEOUT
+        )
         
         # Execute booking flow
-        if not hotel_page.click_book_now():
+        if not book_now or not hotel_page.click_book_now():
             print("\n⚠️  SKIPPING BOOKING - Book Now button not found")
             print("   Moving to next booking...")
             return False, "Skipped - Book Now button not found", 'skipped', None, None
         
-        if not booking_page.enter_guest_details():
+        if not booking_page.enter_guest_details(booking):
             return False, "Failed to enter guest details", None, None, None
         
         if not booking_page.click_pay_now():
@@ -1317,7 +1519,7 @@ def process_single_booking(booking_data, driver, hotel_page, booking_page):
         if not booking_page.select_upi_payment():
             return False, "UPI option not found", None, None, None
         
-        if not booking_page.enter_upi_id():
+        if not booking_page.enter_upi_id(booking.upi_id):
             return False, "Failed to enter UPI ID", None, None, None
         
         if not booking_page.send_payment_request():
@@ -1336,11 +1538,8 @@ def process_single_booking(booking_data, driver, hotel_page, booking_page):
             # Close popup if present
             booking_page.close_popup_if_present()
             
-            # Extract booking ID
-            booking_id = booking_page.extract_booking_id()
-            
-            # Extract price
-            price = booking_page.extract_price()
+            # Extract booking ID and price
+            booking_id, price = booking_page.extract_confirmation()
             
             if booking_id:
                 return True, "Success - Payment Confirmed", payment_status, booking_id, price
@@ -1354,11 +1553,20 @@ def process_single_booking(booking_data, driver, hotel_page, booking_page):
             
             # Still try to close popup and get booking ID
             booking_page.close_popup_if_present()
-            booking_id = booking_page.extract_booking_id()
-            price = booking_page.extract_price()
+            booking_id, price = booking_page.extract_confirmation()
             
             return True, "Completed - Verify payment manually", payment_status, booking_id, price
             
+        elif payment_status == 'declined':
+            print("\n❌ PAYMENT DECLINED!")
+            print(f"  💳 {payment_message}")
+            
+            # Keep the evidence - the screenshot and any ID on the page show what the decline looked like
+            booking_page.close_popup_if_present()
+            booking_id, price = booking_page.extract_confirmation()
+            
+            return False, payment_message, payment_status, booking_id, price
+            
         else:  # error
             print("\n❌ ERROR DURING WAIT!")
             print(f"  💳 {payment_message}")
@@ -1369,6 +1577,169 @@ def process_single_booking(booking_data, driver, hotel_page, booking_page):
         return False, str(e), 'error', None, None
 
 
+def record_booking_result(booking, outcome, sheets_manager):
+    """
+    Derive the sheet Status for a finished booking and write it back
+    Returns: result dict for the run summary
+    """
+    success, message, payment_status, booking_id, price = outcome
+    
+    # Determine status based on result
+    if payment_status == 'skipped':
+        status = 'Skipped'
+    elif success and booking_id:
+        status = 'Completed'
+    elif success:
+        status = 'Pending Verification'
+    else:
+        status = 'Failed'
+    
+    # Update Google Sheet with all data
+    print(f"\n📝 Updating Google Sheet for row {booking.row_number}...")
+    
+    # Status always, Booking ID / Price if available
+    sheets_manager.update_row(booking.row_number, {
+        'Status': status,
+        'Booking_id': booking_id,
+        'Price': price,
+    })
+    
+    # Queued rows go out as one background request every SHEET_FLUSH_ROWS bookings
+    sheets_manager.flush(min_rows=Config.SHEET_FLUSH_ROWS)
+    
+    return {
+        'row': booking.row_number,
+        'success': success,
+        'message': message,
+        'payment_status': payment_status,
+        'booking_id': booking_id,
+        'price': price,
+        'status': status
+    }
+
+
+class DriverPool:
+    """Fixed set of browsers, each checked out by one booking at a time"""
+    
+    def __init__(self, size, use_proxy):
+        self.use_proxy = use_proxy
+        self._slots = queue.Queue()
+        try:
+            for worker_id in range(size):
+                self._slots.put(self._new_slot(worker_id))
+        except Exception:
+            # main() builds the pool outside its try/finally - don't leak the browsers already started
+            self.close()
+            raise
+    
+    def _new_slot(self, worker_id):
+        driver = setup_driver_with_scrapingbee(self.use_proxy, worker_id)
+        return worker_id, driver, HotelPage(driver), BookingPage(driver)
+    
+    def _restart_slot(self, worker_id):
+        """
+        Start a replacement browser for a worker
+        Returns: new slot, or a dead slot (driver None) if the browser failed to start
+        """
+        try:
+            return self._new_slot(worker_id)
+        except Exception as e:
+            print(f"  ✗ Browser restart failed: {e}")
+            return worker_id, None, None, None
+    
+    def acquire(self):
+        """
+        Check out a (worker_id, driver, hotel_page, booking_page) slot
+        Returns: slot - driver is None if the worker's browser could not be started
+        """
+        slot = self._slots.get()
+        if slot[1] is None:
+            print("\n⚠️  Browser unavailable - retrying startup...")
+            slot = self._restart_slot(slot[0])
+        return slot
+    
+    def release(self, slot):
+        """Return a slot - reset it, or rebuild the browser if its session was lost"""
+        worker_id, driver, hotel_page, booking_page = slot
+        if driver is None:
+            pass  # Startup already failed - acquire() retries it for the next booking
+        elif is_session_alive(driver):
+            reset_browser_state(driver)
+            # Next booking starts on a fresh page - nothing cached from this one is reusable
+            hotel_page.clear_cache()
+            booking_page.clear_cache()
+        else:
+            print("\n⚠️  Browser session lost - restarting browser...")
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+            slot = self._restart_slot(worker_id)
+        # Always hand a slot back - a worker blocked in acquire() would hang the whole run
+        self._slots.put(slot)
+    
+    def close(self):
+        """Quit every browser in the pool"""
+        while not self._slots.empty():
+            driver = self._slots.get()[1]
+            if driver is None:
+                continue
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+
+# Prefetch requests run off the booking threads - one at a time, fire-and-forget
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+_PREFETCH_SESSION = requests.Session()
+
+
+def prefetch_hotel_page(booking):
+    """Request a hotel page through the ScrapingBee API and discard it - only the warm-up matters"""
+    params = {
+        'api_key': Config.SCRAPINGBEE_API_KEY,
+        'url': build_hotel_url(booking),
+        'render_js': str(Config.SCRAPINGBEE_RENDER_JS).lower(),
+        'premium_proxy': str(Config.SCRAPINGBEE_PREMIUM).lower(),
+        'country_code': Config.SCRAPINGBEE_COUNTRY,
+    }
+    try:
+        _PREFETCH_SESSION.get("https://app.scrapingbee.com/api/v1/", params=params, timeout=30)
+    except requests.RequestException:
+        pass
+
+
+def run_booking(index, booking, total, pool, sheets_manager, workers, next_booking=None):
+    """Run one booking on a pooled browser and record its result"""
+    # Overlap the next booking's page fetch with this booking's browser work and payment wait
+    if next_booking is not None:
+        _PREFETCH_EXECUTOR.submit(prefetch_hotel_page, next_booking)
+    
+    slot = pool.acquire()
+    _, driver, hotel_page, booking_page = slot
+    try:
+        print(f"\n{'='*70}")
+        print(f" BOOKING {index}/{total}")
+        print(f"{'='*70}")
+        
+        if driver is None:
+            print("\n❌ BOOKING FAILED: Browser unavailable")
+            outcome = (False, "Browser unavailable - Chrome failed to start", 'error', None, None)
+        else:
+            outcome = process_single_booking(booking, driver, hotel_page, booking_page)
+        result = record_booking_result(booking, outcome, sheets_manager)
+    finally:
+        pool.release(slot)
+    
+    # Wait between bookings - only if another booking will start on this worker
+    if index <= total - workers and Config.INTER_BOOKING_DELAY:
+        print(f"\n⏳ Waiting {Config.INTER_BOOKING_DELAY:g} seconds before next booking...")
+        time.sleep(Config.INTER_BOOKING_DELAY)
+    
+    return result
+
+
 # =========================================================
 # MAIN EXECUTION
 # =========================================================
@@ -1401,7 +1772,7 @@ def main():
     print("\n--- PAYMENT WAITING CONFIGURATION ---")
     print(f"✓ Will wait {Config.PAYMENT_WAIT_TIMEOUT} seconds after payment request")
     print(f"✓ Screenshot will be taken after {Config.PAYMENT_WAIT_TIMEOUT} seconds")
-    print(f"✓ Checking for confirmation every {Config.PAYMENT_CHECK_INTERVAL} seconds")
+    print(f"✓ Checking for confirmation every {Config.PAYMENT_CHECK_INTERVAL}-{Config.PAYMENT_CHECK_MAX_INTERVAL} seconds")
     
     # ScrapingBee configuration
     print("\n--- PROXY CONFIGURATION ---")
@@ -1409,7 +1780,7 @@ def main():
     
     if use_proxy in ['yes', 'y']:
         print(f"\n🐝 ScrapingBee: ENABLED")
-        print(f"   Country: India | Premium: True | JS Rendering: True")
+        print(f"   Country: India | Premium: {Config.SCRAPINGBEE_PREMIUM} | JS Rendering: {Config.SCRAPINGBEE_RENDER_JS}")
         USE_PROXY_FLAG = True
     else:
         print(f"\n🚫 Proxy: DISABLED (Direct connection)")
@@ -1426,7 +1797,7 @@ def main():
     
     # Get pending bookings
     print("\n📋 Loading pending bookings...")
-    bookings = sheets_manager.get_pending_bookings()
+    bookings = [Booking.from_row(row) for row in sheets_manager.get_pending_bookings()]
     
     if not bookings:
         print("\n⚠️  No pending bookings found!")
@@ -1443,125 +1814,108 @@ def main():
         print("❌ Cancelled.")
         return
     
-    # Setup Chrome
-    print("\n🔧 Initializing browser...")
-    driver = setup_driver_with_scrapingbee(USE_PROXY_FLAG)
+    # Screenshot folder is created once here, not on every screenshot
+    os.makedirs(Config.SCREENSHOT_PATH, exist_ok=True)
     
-    # Initialize pages
-    hotel_page = HotelPage(driver)
-    booking_page = BookingPage(driver)
+    # Setup Chrome - each worker reuses its own browser for every booking
+    workers = max(1, min(Config.MAX_WORKERS, len(bookings)))
+    print(f"\n🔧 Initializing {workers} browser(s)...")
+    pool = DriverPool(workers, USE_PROXY_FLAG)
     
-    # Process each booking
-    results = []
-    
-    for i, booking in enumerate(bookings, 1):
-        print(f"\n{'='*70}")
-        print(f" BOOKING {i}/{len(bookings)}")
-        print(f"{'='*70}")
+    try:
+        # Process bookings - results keep sheet order
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # A worker's next booking sits `workers` rows further down the list
+            prefetch = Config.PREFETCH_NEXT_HOTEL and USE_PROXY_FLAG
+            futures = [
+                executor.submit(
+                    run_booking, i, booking, len(bookings), pool, sheets_manager, workers,
+                    bookings[i - 1 + workers] if prefetch and i - 1 + workers < len(bookings) else None
+                )
+                for i, booking in enumerate(bookings, 1)
+            ]
+            try:
+                results = [future.result() for future in futures]
+            except BaseException:
+                # Ctrl-C or a crash - drop queued bookings so none of them sends another payment request
+                print("\n⚠️  Stopping - cancelling bookings that haven't started yet...")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
         
-        success, message, payment_status, booking_id, price = process_single_booking(
-            booking, 
-            driver, 
-            hotel_page, 
-            booking_page
-        )
+        # Make sure every sheet update has landed before reporting
+        sheets_manager.wait_for_writes()
         
-        # Determine status based on result
-        if payment_status == 'skipped':
-            status = 'Skipped'
-        elif success and booking_id:
-            status = 'Completed'
-        elif success:
-            status = 'Pending Verification'
-        else:
-            status = 'Failed'
+        # Summary - tally everything in one pass over the results
+        successful = failed = skipped = 0
+        payment_confirmed = payment_unknown = 0
+        booking_ids_found = prices_found = 0
+        skipped_rows, failed_rows, booked_rows = [], [], []
+        for r in results:
+            payment_status = r.get('payment_status')
+            if payment_status == 'skipped':
+                skipped += 1
+                skipped_rows.append(r)
+            elif r['success']:
+                successful += 1
+            else:
+                failed += 1
+                failed_rows.append(r)
+            payment_confirmed += payment_status == 'success'
+            payment_unknown += payment_status == 'timeout'
+            if r.get('booking_id'):
+                booking_ids_found += 1
+                booked_rows.append(r)
+            prices_found += bool(r.get('price'))
         
-        # Update Google Sheet with all data
-        print(f"\n📝 Updating Google Sheet for row {booking['row_number']}...")
+        # Build the whole report first, then send it in one write
+        lines = [
+            "\n" + "="*70,
+            " AUTOMATION SUMMARY",
+            "="*70,
+            f"  Total Bookings: {len(results)}",
+            f"  ✅ Successful: {successful}",
+            f"  ⏭️  Skipped: {skipped}",
+            f"  ❌ Failed: {failed}",
+            # Payment status breakdown
+            f"\n  Payment Status Breakdown:",
+            f"  💚 Confirmed within 15s: {payment_confirmed}",
+            f"  ⏱️  Status Unknown (verify manually): {payment_unknown}",
+            # Booking IDs captured
+            f"\n  Data Captured:",
+            f"  🎫 Booking IDs: {booking_ids_found}/{len(results)}",
+            f"  💰 Prices: {prices_found}/{len(results)}",
+        ]
         
-        # Update Status
-        sheets_manager.update_status(booking['row_number'], status)
+        if booking_ids_found > 0:
+            lines.append(f"\n  Booking Details:")
+            for r in booked_rows:
+                price_str = f" | Price: {r['price']}" if r.get('price') else ""
+                status_str = f" | Status: {r.get('status', 'Unknown')}"
+                lines.append(f"    - Row {r['row']}: {r['booking_id']}{price_str}{status_str}")
         
-        # Update Booking ID if available
-        if booking_id:
-            sheets_manager.update_booking_id(booking['row_number'], booking_id)
+        if skipped > 0:
+            lines.append("\n  Skipped Bookings:")
+            lines += [f"    - Row {r['row']}: {r['message']}" for r in skipped_rows]
         
-        # Update Price if available
-        if price:
-            sheets_manager.update_price(booking['row_number'], price)
+        if failed > 0:
+            lines.append("\n  Failed Bookings:")
+            lines += [f"    - Row {r['row']}: {r['message']}" for r in failed_rows]
         
-        results.append({
-            'row': booking['row_number'],
-            'success': success,
-            'message': message,
-            'payment_status': payment_status,
-            'booking_id': booking_id,
-            'price': price,
-            'status': status
-        })
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
         
-        # Wait between bookings - automatically proceed after 90 second wait
-        if i < len(bookings):
-            print(f"\n⏳ Waiting 10 seconds before next booking...")
-            time.sleep(10)
-    
-    # Summary
-    print("\n" + "="*70)
-    print(" AUTOMATION SUMMARY")
-    print("="*70)
-    
-    successful = sum(1 for r in results if r['success'])
-    failed = sum(1 for r in results if not r['success'] and r.get('payment_status') != 'skipped')
-    skipped = sum(1 for r in results if r.get('payment_status') == 'skipped')
-    
-    print(f"  Total Bookings: {len(results)}")
-    print(f"  ✅ Successful: {successful}")
-    print(f"  ⏭️  Skipped: {skipped}")
-    print(f"  ❌ Failed: {failed}")
-    
-    # Payment status breakdown
-    payment_confirmed = sum(1 for r in results if r.get('payment_status') == 'success')
-    payment_unknown = sum(1 for r in results if r.get('payment_status') == 'timeout')
-    
-    print(f"\n  Payment Status Breakdown:")
-    print(f"  💚 Confirmed within 15s: {payment_confirmed}")
-    print(f"  ⏱️  Status Unknown (verify manually): {payment_unknown}")
-    
-    # Booking IDs captured
-    booking_ids_found = sum(1 for r in results if r.get('booking_id'))
-    prices_found = sum(1 for r in results if r.get('price'))
-    
-    print(f"\n  Data Captured:")
-    print(f"  🎫 Booking IDs: {booking_ids_found}/{len(results)}")
-    print(f"  💰 Prices: {prices_found}/{len(results)}")
-    
-    if booking_ids_found > 0:
-        print(f"\n  Booking Details:")
-        for r in results:
-            if r.get('booking_id'):
-                price_str = f" | Price: {r['price']}" if r.get('price') else ""
-                status_str = f" | Status: {r.get('status', 'Unknown')}"
-                print(f"    - Row {r['row']}: {r['booking_id']}{price_str}{status_str}")
-    
-    if skipped > 0:
-        print("\n  Skipped Bookings:")
-        for r in results:
-            if r.get('payment_status') == 'skipped':
-                print(f"    - Row {r['row']}: {r['message']}")
-    
-    if failed > 0:
-        print("\n  Failed Bookings:")
-        for r in results:
-            if not r['success'] and r.get('payment_status') != 'skipped':
-                print(f"    - Row {r['row']}: {r['message']}")
-    
-    print("\n⏳ Browser will stay open for 30 seconds...")
-    time.sleep(30)
-    
-    # Cleanup
-    print("\n🔒 Closing browser...")
-    driver.quit()
-    print("✅ Done!\n")
+        if Config.KEEP_OPEN_SECONDS and sys.stdout.isatty():
+            print(f"\n⏳ Browser will stay open for {Config.KEEP_OPEN_SECONDS} seconds...")
+            time.sleep(Config.KEEP_OPEN_SECONDS)
+        
+    finally:
+        # Cleanup
+        sheets_manager.wait_for_writes()
+        print("\n🔒 Closing browser...")
+        pool.close()
+        _PREFETCH_EXECUTOR.shutdown(wait=False, cancel_futures=True)  # Warm-ups are useless now
+        _SCREENSHOT_EXECUTOR.shutdown(wait=True)  # Let pending screenshot writes finish
+        print("✅ Done!\n")
 
 
 if __name__ == "__main__":